@@ -1,22 +1,46 @@
 """ Camera class """
-import os
-import json
-from interface import Interface
-from exposure import Exposure
 import version
 
-default_host_config = os.path.join(version.CONFIG_DIR, "hosts.json")
+# the same path as interface.default_host_config, so that both hit the
+# same config cache entry
+default_host_config = version.HOST_CONFIG
 
-class Camera(Interface, Exposure):
 
-    verbose = False
+def _make_camera_class():
+    """
+    Build the Camera class. Interface and Exposure (and the socket and
+    numerical modules they pull in) are only imported here, the first
+    time camera.Camera is used.
+    """
+    from interface import Interface, _parse_config
+    from exposure import Exposure
 
-    def __init__(self, verbose=True, host_config_file=default_host_config):
+    class Camera(Interface, Exposure):
 
-        super().__init__(verbose, host_config_file)
+        def __init__(self, verbose=True, host_config_file=default_host_config):
 
-        self.verbose = verbose
-        # read hosts
-        with open(host_config_file) as hcfgf:
-            hosts = json.load(hcfgf)
-        self.hosts = hosts
+            # Interface reads the hosts through its config cache
+            super().__init__(verbose, host_config_file=host_config_file)
+
+        @classmethod
+        def clear_host_cache(cls):
+            """
+            Discard cached config files, forcing the next Camera to
+            re-read them from disk.
+            """
+            _parse_config.cache_clear()
+
+    Camera.__module__ = __name__
+    Camera.__qualname__ = "Camera"
+    return Camera
+
+
+def __getattr__(name):
+    """
+    Create Camera on first access (PEP 562).
+    """
+    if name == "Camera":
+        cls = _make_camera_class()
+        globals()["Camera"] = cls
+        return cls
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
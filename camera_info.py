@@ -20,6 +20,30 @@
 # The CameraInfo class stores and retrieves current settings for
 # the camera module of the ztf package.
 # --------------------------------------------------------------------------
+import sys
+from dataclasses import dataclass
+
+
+def _intern(value):
+    """
+    sys.intern a str setting; anything else (e.g. None) is stored as is.
+    """
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(frozen=True)
+class CameraConfig:
+    """
+    Immutable, hashable snapshot of the CameraInfo settings.
+    Use it as a dict or set key, e.g. for per-mode caches.
+    """
+    interface: str = "archon"
+    mode: str = "DEFAULT"
+    basename: str = ""
+    power_on: bool = False
+    acf_file: str = "DEFAULT"
+
+
 class CameraInfo:
     """
     This is the CameraInfo class, which is used to store
@@ -30,6 +54,9 @@ class CameraInfo:
     The user should never need to look in here.
     """
 
+    __slots__ = ("_interface", "_mode", "_basename", "_power_on", "_acf_file",
+                 "_config")
+
     def __init__(
         self,
         interface="archon",
@@ -47,32 +74,114 @@ class CameraInfo:
         self.power_on = power_on
         self.acf_file = acf_file
 
+    @property
+    def config(self):
+        """
+        The current settings as a CameraConfig. The snapshot is
+        cached until one of the settings changes.
+        """
+        if self._config is None:
+            self._config = CameraConfig(self._interface, self._mode,
+                                        self._basename, self._power_on,
+                                        self._acf_file)
+        return self._config
+
+    @property
+    def interface(self):
+        """
+        The controller interface, "archon" or "arc".
+        """
+        return self._interface
+
+    @interface.setter
+    def interface(self, interface):
+        self._interface = interface
+        self._config = None
+
+    @property
+    def basename(self):
+        """
+        The base name.
+        """
+        return self._basename
+
+    @basename.setter
+    def basename(self, basename):
+        self._basename = _intern(basename)
+        self._config = None
+
+    @property
+    def mode(self):
+        """
+        The camera mode as a string.
+        Allow any mode here. The server will do the error checking.
+        """
+        return self._mode
+
+    @mode.setter
+    def mode(self, mode_in):
+        self._mode = _intern(mode_in)
+        self._config = None
+
+    @property
+    def power_on(self):
+        """
+        True if power on, otherwise False.
+        """
+        return self._power_on
+
+    @power_on.setter
+    def power_on(self, power_on):
+        self._power_on = power_on
+        self._config = None
+
+    @property
+    def acf_file(self):
+        """
+        The acf file.
+        """
+        return self._acf_file
+
+    @acf_file.setter
+    def acf_file(self, acf_file):
+        # None after loading the default acf file
+        self._acf_file = _intern(acf_file)
+        self._config = None
+
+    # deprecated accessors, kept for backward-compatibility
+    #
     def get_basename(self):
         """
         Return the base name.
+        Deprecated: use the basename attribute.
         """
         return self.basename
 
     def get_mode(self):
         """
         Return the camera mode as a string.
+        Deprecated: use the mode attribute.
         """
         return self.mode
 
     def get_power(self):
         """
         Returns: True if power on, otherwise False.
+        Deprecated: use the power_on attribute.
         """
         return self.power_on
+
     def get_acf_file(self):
         """
         Returns: acf file
+        Deprecated: use the acf_file attribute.
         """
         return self.acf_file
 
     def set_basename(self, basename):
         """
         Set the basename.
+        Deprecated: assign to the basename attribute.
         """
         self.basename = basename
         return 0
@@ -80,7 +189,7 @@ class CameraInfo:
     def set_mode(self, mode_in):
         """
         Set the camera mode.
-        Allow any mode here. The server will do the error checking.
+        Deprecated: assign to the mode attribute.
         """
         self.mode = mode_in
         return 0
@@ -88,6 +197,7 @@ class CameraInfo:
     def set_power_on(self, power_on):
         """
         Set the power on.
+        Deprecated: assign to the power_on attribute.
         Args:
             power_on: True or False
         """
@@ -97,6 +207,7 @@ class CameraInfo:
     def set_acf_file(self, acf_file):
         """
         Set the acf file.
+        Deprecated: assign to the acf_file attribute.
         Args:
             acf_file:
         """
@@ -3,7 +3,7 @@
     This includes:
         exptime:
         iterations:
-        imtype:
+        imtype: an ImType
 
 """
 # --------------------------------------------------------------------------
@@ -15,37 +15,29 @@
 # The ExposureInfo class stores and retrieves current settings for
 # the exposure.
 # --------------------------------------------------------------------------
+from image_types import ImType, TYPE, TYPE_NAME
+
+
 class ExposureInfo:
     """
-    This is the CameraInfo class, which is used to store
-    and retrieve current settings, in particular the
-    camera mode, image type, basename, and exposure time.
+    This is the ExposureInfo class, which is used to store
+    and retrieve current exposure settings, in particular the
+    image type, number of iterations, and exposure time.
 
     This is for internal use only by the camera module.
     The user should never need to look in here.
     """
 
-    # codes for types
+    # codes for types (shared, read-only)
     #
-    TYPE = {
-        "OBJECT": 0,
-        "BIAS": 1,
-        "DARK": 2,
-        "DOME_FLAT": 3,
-        "TWILIGHT_FLAT": 4,
-        "FOCUS": 5,
-        "POINTING": 6,
-        "TEST": 7,
-        "ILLUMINATION": 8,
-        "FRINGE": 9,
-        "SEEING": 10,
-        "OTHER": 11,
-    }
-    TYPE_NAME = {v: k for k, v in TYPE.items()}
+    TYPE = TYPE
+    TYPE_NAME = TYPE_NAME
+
+    __slots__ = ("_imtype", "_type_name", "_iterations", "_exptime")
 
     def __init__(
         self,
-        imtype=TYPE["TEST"],
+        imtype=ImType.TEST,
         iterations=1,
         exptime=0,
     ):
@@ -57,59 +49,111 @@ class ExposureInfo:
         self.exptime = exptime
 
 
+    @property
+    def exptime(self):
+        """
+        The exposure time.
+        Raises ValueError if set to a negative value.
+        """
+        return self._exptime
+
+    @exptime.setter
+    def exptime(self, exptime):
+        if exptime < 0:
+            raise ValueError("exptime must be >= 0")
+        self._exptime = exptime
+
+    @property
+    def iterations(self):
+        """
+        The number of iterations.
+        Raises ValueError if set to a value < 1.
+        """
+        return self._iterations
+
+    @iterations.setter
+    def iterations(self, iterations):
+        if iterations <= 0:
+            raise ValueError("iterations must be > 0")
+        self._iterations = iterations
+
+    @property
+    def imtype(self):
+        """
+        The image type as an ImType.
+        """
+        return self._imtype
+
+    @imtype.setter
+    def imtype(self, imtype):
+        self._imtype = ImType(imtype)
+        self._type_name = self._imtype.name
+
+    @property
+    def type(self):
+        """
+        The image type as a string.
+        Raises ValueError if set to an unknown type.
+        """
+        return self._type_name
+
+    @type.setter
+    def type(self, imtype):
+        # TYPE is the C-level view of ImType's name map; ImType[name]
+        # does the same lookup through a Python-level __getitem__
+        try:
+            self._imtype = TYPE[imtype]
+        except KeyError:
+            raise ValueError("invalid image type %r, valid types: %s"
+                             % (imtype, ", ".join(ImType.__members__))) from None
+        self._type_name = self._imtype.name
+
+    # deprecated accessors, kept for backward-compatibility
+    #
     def get_exptime(self):
         """
         Return the exposure time.
+        Deprecated: use the exptime attribute.
         """
         return self.exptime
 
     def get_iterations(self):
         """
         Return the iterations
+        Deprecated: use the iterations attribute.
         """
         return self.iterations
 
     def get_type(self):
         """
         Return the image type as a string.
+        Deprecated: use the type attribute.
         """
-        return self.TYPE_NAME[self.imtype]
+        return self.type
 
     def set_exptime(self, exptime):
         """
         Set the exposure time.
+        Deprecated: assign to the exptime attribute.
+        Raises ValueError if exptime < 0.
         """
-        retval = 0
-        if exptime >= 0:
-            self.exptime = exptime
-        else:
-            print("  exptime must be >= 0")
-            retval = 1
-
-        return retval
+        self.exptime = exptime
+        return 0
 
     def set_iterations(self, iterations):
         """
         Set the iterations
+        Deprecated: assign to the iterations attribute.
+        Raises ValueError if iterations < 1.
         """
-        retval = 0
-        if iterations > 0:
-            self.iterations = iterations
-        else:
-            print("  iterations must be > 0")
-            retval = 1
+        self.iterations = iterations
+        return 0
 
-        return retval
     def set_type(self, imtype):
         """
         Set the image type.
+        Deprecated: assign to the type attribute.
+        Raises ValueError for an unknown type.
         """
-        retval = 0
-        if imtype in self.TYPE.keys():
-            self.imtype = self.TYPE[imtype]
-        else:
-            print("  valid CameraInfo types:", end=" ")
-            print(self.TYPE.keys())
-            retval = 1
-
-        return retval
+        self.type = imtype
+        return 0
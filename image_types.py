@@ -0,0 +1,43 @@
+"""Image type codes
+
+    This includes:
+        ImType: integer codes for the image types, by name
+        TYPE, TYPE_NAME: read-only name -> code and code -> name maps
+
+"""
+# --------------------------------------------------------------------------
+# @file:     image_types.py
+# @brief:    ImType enumeration
+#
+# Image type codes shared by every ExposureInfo instance.
+# --------------------------------------------------------------------------
+from enum import IntEnum
+from types import MappingProxyType
+
+
+class ImType(IntEnum):
+    """
+    Image type codes. The member name is the string written to
+    the IMTYPE keyword.
+    """
+    OBJECT = 0
+    BIAS = 1
+    DARK = 2
+    DOME_FLAT = 3
+    TWILIGHT_FLAT = 4
+    FOCUS = 5
+    POINTING = 6
+    TEST = 7
+    ILLUMINATION = 8
+    FRINGE = 9
+    SEEING = 10
+    OTHER = 11
+
+
+# name -> type, kept for callers of the old TYPE dict
+#
+TYPE = ImType.__members__
+
+# type code -> name, kept for callers of the old TYPE_NAME dict
+#
+TYPE_NAME = MappingProxyType({imtype: imtype.name for imtype in ImType})
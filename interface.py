@@ -1,12 +1,19 @@
 """Main interface."""
+import errno
 import socket
-import select
+import selectors
 import os
+import re
 import json
-from threading import Thread
 import time
-from numpy import iterable
-import numpy as np
+import functools
+import threading
+import logging
+from typing import NamedTuple
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
 
 import version
 from camera_info import CameraInfo
@@ -14,8 +21,173 @@ from exposure_info import ExposureInfo
 # Instantiate a global object of the CameraInfo class. This
 # carries default and current camera settings (mode, type, etc.)
 
+
+# progress (INFO) and per-command trace (DEBUG) messages. Handlers and
+# levels are left to the application; verbose also prints the messages.
+log = logging.getLogger(__name__)
+
 default_interface_config = os.path.join(version.CONFIG_DIR, "interface.json")
-default_host_config = os.path.join(version.CONFIG_DIR, "hosts.json")
+default_host_config = version.HOST_CONFIG
+
+# terminates every command line sent to camerad
+ENDCHAR = "\n"
+# seconds to wait for all cameras to reply to a command
+REPLY_TIMEOUT = 10
+# seconds to wait for the connections to the camera servers
+CONNECT_TIMEOUT = 5
+# bytes requested per recv() while reading a reply
+RECV_SIZE = 4096
+# an error reply, with the error number camerad may append to it
+REPLY_ERROR = re.compile(rb"ERROR[ \t]*(\d*)")
+# kernel send/receive buffer size for camera sockets
+SOCKET_BUFSIZE = 1 << 20
+
+# encoded "setp BitLevel" command line for each magic board bit value
+SETP_BITLEVEL = {
+    "0": b"setp BitLevel 1" + ENDCHAR.encode(),
+    "1": b"setp BitLevel 2" + ENDCHAR.encode(),
+}
+
+# magic board bitstrings by identifier name, indexed by channel number
+# modulo the number of channels of that kind
+MAGIC_BITSTRINGS = {
+    "driver": tuple(f"{chan:06b}" for chan in range(24)),
+    "dnl": (f"{24:06b}",),
+    "hvlc": tuple(f"{32 + chan:06b}" for chan in range(24)),
+    "hvhc": tuple(f"{56 + chan:06b}" for chan in range(6)),
+    "adc": tuple(f"{1 << chan:016b}" for chan in range(16)),
+}
+
+
+class Host(NamedTuple):
+    """One camera server: its name, address, and socket once opened."""
+    name: str
+    ip: str
+    port: int
+    socket: object = None
+
+
+def _reply_error(reply, start, end):
+    """
+    The error number of the first ERROR in reply[start:end], 1 if it
+    has none, or 0 if there is no ERROR in the reply.
+    """
+    match = REPLY_ERROR.search(reply, start, end)
+    if match is None:
+        return 0
+    return int(match.group(1) or 0) or 1
+
+
+def _skip_lines(reply, end, nlines):
+    """
+    The offset in reply[:end] just past its first nlines lines, or end
+    if it has fewer.
+    """
+    start = 0
+    for _ in range(nlines):
+        start = reply.find(b"\n", start, end) + 1
+        if not start:
+            return end
+    return start
+
+
+def make_hosts(host_config):
+    """
+    Build the {name: Host} table from a parsed hosts config.
+    """
+    return {name: Host(name, cfg["ip"], cfg["port"])
+            for name, cfg in host_config.items()}
+
+
+def _start_connect(addresses, last_error=None):
+    """
+    Create a non-blocking camera socket and start connecting it to the
+    next of addresses (an iterator of getaddrinfo results) that takes
+    it. The connection completes when the socket becomes writable; if
+    it fails, call again with the same iterator to try the next
+    address. Raises the last OSError (or last_error, that of the
+    address tried before) once no address is left.
+    """
+    for family, socktype, proto, _, address in addresses:
+        try:
+            sock = socket.socket(family, socktype, proto)
+        except OSError as err:
+            last_error = err
+            continue
+        try:
+            # commands and replies are short lines; send them immediately
+            # rather than letting Nagle hold them back for an ACK
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # set before connecting, so the larger receive window is
+            # already offered in the handshake
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF,
+                            SOCKET_BUFSIZE)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                            SOCKET_BUFSIZE)
+            # notice a controller that went away between exposures
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            # replies are multiplexed with a selector, never waited on
+            sock.setblocking(False)
+            code = sock.connect_ex(address)
+            if code not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                raise OSError(code, os.strerror(code))
+        except OSError as err:
+            sock.close()
+            last_error = err
+            continue
+        return sock
+    raise last_error
+
+
+@functools.lru_cache(maxsize=32)
+def _encode_command(command):
+    """
+    The encoded command line for a command without arguments.
+    """
+    return (command + ENDCHAR).encode()
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_config(path, mtime_ns):
+    """
+    Parse a json config file.
+
+    The result is cached on (path, mtime_ns), so the file is only
+    re-read when it changes on disk. The cached dict is shared and
+    must not be modified.
+    """
+    with open(path, "rb") as cfgf:
+        return _json.loads(cfgf.read())
+
+
+def _load_config(path):
+    """
+    The parsed contents of the json config file at path, from the
+    cache unless the file has changed.
+    """
+    path = os.fspath(path)
+    return _parse_config(path, os.stat(path).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=32)
+def _expand_user(path):
+    """
+    Cached os.path.expanduser, which looks up the home directory.
+    """
+    return os.path.expanduser(path)
+
+
+def _resolve_path(path):
+    """
+    Absolute path of path (a str or path-like object), with a leading
+    ~ expanded. An absolute path only gets normalized (no system
+    calls). Relative paths are not cached, since they depend on the
+    current directory.
+    """
+    path = os.fspath(path)
+    if path.startswith("~"):
+        path = _expand_user(path)
+    return os.path.abspath(path)
 
 
 class Interface:
@@ -25,26 +197,42 @@ class Interface:
                  interface_config_file=default_interface_config,
                  host_config_file=default_host_config):
 
-        # read interface
-        with open(interface_config_file) as icfgf:
-            camera_interface = json.load(icfgf)
+        # read interface (parsed once per file version, see _load_config)
+        camera_interface = _load_config(interface_config_file)
         self.interface = camera_interface["interface"]
         if "archon" in self.interface:
             self.archon = True
             self.device_list = []
         else:
             self.archon = False
-            self.device_list = camera_interface["device_list"]
+            # copied, so changes here do not reach the cached config
+            self.device_list = list(camera_interface["device_list"])
 
-        # read hosts
-        with open(host_config_file) as hcfgf:
-            hosts = json.load(hcfgf)
-        self.hosts = hosts
+        # read hosts (make_hosts copies out of the shared cached config)
+        self.hosts = make_hosts(_load_config(host_config_file))
 
         self.caminfo = CameraInfo()
         self.expinfo = ExposureInfo()
         self.verbose = verbose
         self.number_of_connections = 0
+        # the hosts entries with an open socket, by host name
+        self._connected = {}
+        # reply lines each camera still owes for commands that timed out
+        # or were interrupted, by host name; they are read and discarded
+        # ahead of the reply to the next command
+        self._owed = {}
+        # every open camera socket stays registered here for reading
+        self._selector = selectors.DefaultSelector()
+        # one command exchange, open or close on the sockets at a time;
+        # reentrant, since camerad_open and close send commands themselves
+        self._command_lock = threading.RLock()
+        # interrupt() writes to _wake_w to end a wait for replies early;
+        # _wake_r is registered with no host name
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._interrupted = False
 
         self.set_verbosity(verbose)
 
@@ -54,6 +242,22 @@ class Interface:
             self.print_settings()
 
 
+    # --------------------------------------------------------------------------
+    # @fn     __del__
+    # @brief  close the sockets still open when the Interface is dropped
+    #
+    # The camera connections are closed without sending close to camerad.
+    # --------------------------------------------------------------------------
+    def __del__(self):
+        for entry in getattr(self, "hosts", {}).values():
+            if entry.socket is not None:
+                entry.socket.close()
+        for name in ("_wake_r", "_wake_w", "_selector"):
+            resource = getattr(self, name, None)
+            if resource is not None:
+                resource.close()
+
+
     # --------------------------------------------------------------------------
     # @fn     verbose
     # --------------------------------------------------------------------------
@@ -78,11 +282,13 @@ class Interface:
         """
         Print the current camera settings
         """
+        caminfo = self.caminfo
+        expinfo = self.expinfo
         if self.archon:
-            print("  mode          = '%s'" % self.caminfo.get_mode())
-        print("  basename      = '%s'" % self.caminfo.get_basename())
-        print("  type          = '%s'" % self.expinfo.get_type())
-        print("  exptime       = %d" % self.expinfo.get_exptime())
+            print("  mode          = '%s'" % caminfo.mode)
+        print("  basename      = '%s'" % caminfo.basename)
+        print("  type          = '%s'" % expinfo.type)
+        print("  exptime       = %d" % expinfo.exptime)
 
     # --------------------------------------------------------------------------
     # @fn     camerad_open
@@ -96,35 +302,85 @@ class Interface:
         default, this opens connections to all hosts (cameras 1-4).  To
         open only to the local host, use hostlist='local'
         """
+        with self._command_lock:
+            if hostlist is None:
+                hostlist = list(self.hosts)
+            if hostlist == "local":
+                hostlist = ["localhost"]
+
+            if not isinstance(hostlist, (list, tuple, set)):
+                hostlist = [hostlist]
+
+            # open sockets to camera servers indicated by hostlist. All of the
+            # connections are started at once and waited for together, so a
+            # dead host costs one timeout in total rather than one each.
+            # Each host's addresses (e.g. IPv6 and IPv4 for a name) are
+            # tried in the order getaddrinfo gives them.
+            failed = 0
+            connecting = selectors.DefaultSelector()
+            for host in hostlist:
+                if self.hosts[host].socket is not None:
+                    # reopening, e.g. after the connection was dropped
+                    self.__close_socket(host)
+                entry = self.hosts[host]
+                self.__report(logging.INFO, "connecting to %s: %s %d",
+                              host, entry.ip, entry.port)
+                try:
+                    addresses = iter(socket.getaddrinfo(
+                        entry.ip, entry.port, type=socket.SOCK_STREAM))
+                    sock = _start_connect(addresses)
+                except OSError as err:
+                    print("unable to connect to %s: %s" % (host, err))
+                    failed += 1
+                    continue
+                connecting.register(sock, selectors.EVENT_WRITE,
+                                    (host, addresses))
+
+            deadline = time.monotonic() + CONNECT_TIMEOUT
+            while connecting.get_map():
+                timeout = deadline - time.monotonic()
+                events = connecting.select(timeout) if timeout > 0 else []
+                if not events:
+                    for key in list(connecting.get_map().values()):
+                        print("unable to connect to %s: timed out"
+                              % key.data[0])
+                        connecting.unregister(key.fileobj)
+                        key.fileobj.close()
+                        failed += 1
+                    break
+                for key, _ in events:
+                    (host, addresses), sock = key.data, key.fileobj
+                    connecting.unregister(sock)
+                    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if err:
+                        sock.close()
+                        try:
+                            sock = _start_connect(
+                                addresses, OSError(err, os.strerror(err)))
+                        except OSError as last:
+                            print("unable to connect to %s: %s"
+                                  % (host, last.strerror or last))
+                            failed += 1
+                            continue
+                        connecting.register(sock, selectors.EVENT_WRITE,
+                                            key.data)
+                        continue
+                    self._selector.register(sock, selectors.EVENT_READ, host)
+                    self.hosts[host] = self.hosts[host]._replace(socket=sock)
+                    self._owed[host] = 0
+                    self.number_of_connections += 1
+            connecting.close()
+            self.__update_connected()
+
+            # send open to all connections
+            error = self.__send_command("open")[0] or int(failed > 0)
+
+            if error == 0:
+                print("connected to camerad")
+            else:
+                print("Error opening connection to camerad")
 
-        if hostlist is None:
-            hostlist = list(self.hosts.keys())
-        if hostlist == "local":
-            hostlist = ["localhost"]
-
-        if not iterable(hostlist):
-            hostlist = [hostlist]
-
-        # open sockets to camera servers indicated by hostlist
-        for host in hostlist:
-            if self.verbose:
-                print("connecting to %s: %s %d" % (host, self.hosts[host]["ip"],
-                                                   self.hosts[host]["port"]))
-            self.hosts[host]["socket"] = socket.socket(socket.AF_INET,
-                                                       socket.SOCK_STREAM)
-            self.hosts[host]["socket"].connect((self.hosts[host]["ip"],
-                                                self.hosts[host]["port"]))
-            self.number_of_connections += 1
-
-        # send open to all connections
-        error = self.__send_command("open")[0]
-
-        if error == 0:
-            print("connected to camerad")
-        else:
-            print("Error opening connection to camerad")
-
-        return error
+            return error
 
 
     # --------------------------------------------------------------------------
@@ -134,24 +390,105 @@ class Interface:
         """
         close connection to camera
         """
+        with self._command_lock:
+            # send the camera close command to each host
+            #
+            error = self.__send_command("close")[0]
+
+            # then close sockets to camera servers that were opened.
+            #
+            for host, entry in self.hosts.items():
+                if entry.socket is None:
+                    continue
+                self.__report(logging.INFO, "closing connection to %s: %s",
+                              host, entry.ip)
+                self.__close_socket(host)
+            self.__update_connected()
+            if error == 0:
+                print("camera closed")
 
-        # send the camera close command to each host
-        #
-        error = self.__send_command("close")[0]
-
-        # then close sockets to camera servers that were opened.
-        #
-        for host in self.hosts:
-            if self.verbose:
-                print("closing connection to %s: %s" % (host,
-                                                        self.hosts[host]["ip"]))
-            self.hosts[host]["socket"].close()
-            del self.hosts[host]["socket"]
-            self.number_of_connections -= 1
-        if error == 0:
-            print("camera closed")
+            return error
 
-        return error
+
+    # --------------------------------------------------------------------------
+    # @fn     interrupt
+    # --------------------------------------------------------------------------
+    def interrupt(self):
+        """
+        Stop waiting for the replies to the command in progress, from
+        another thread (e.g. a threading.Timer or a GUI). The command
+        returns an error right away instead of at the reply timeout.
+        Does nothing if no command is in progress.
+        """
+        self._interrupted = True
+        try:
+            self._wake_w.send(b"\0")
+        except BlockingIOError:
+            # already woken, and not yet seen
+            pass
+
+
+    # --------------------------------------------------------------------------
+    # @fn     __clear_wake
+    # @brief  discard pending interrupt() wake-ups
+    #
+    # This is an internal package function, not meant to be called by the user.
+    # --------------------------------------------------------------------------
+    def __clear_wake(self):
+        self._interrupted = False
+        try:
+            while self._wake_r.recv(RECV_SIZE):
+                pass
+        except BlockingIOError:
+            pass
+
+
+    # --------------------------------------------------------------------------
+    # @fn     __report
+    # @brief  log a message, and print it too when verbose
+    #
+    # This is an internal package function, not meant to be called by the user.
+    # level is logging.INFO for progress messages and logging.DEBUG for the
+    # per-command trace; msg is %-formatted with args only if it is shown.
+    # --------------------------------------------------------------------------
+    def __report(self, level, msg, *args):
+        log.log(level, msg, *args)
+        if self.verbose:
+            print(msg % args if args else msg)
+
+
+    # --------------------------------------------------------------------------
+    # @fn     __close_socket
+    # @brief  close the socket to one camera server
+    #
+    # This is an internal package function, not meant to be called by the user.
+    # Call __update_connected once the sockets are closed.
+    # --------------------------------------------------------------------------
+    def __close_socket(self, host):
+        entry = self.hosts[host]
+        try:
+            self._selector.unregister(entry.socket)
+        except KeyError:
+            # already dropped, after the server closed the connection
+            # or it fell out of step with its replies
+            pass
+        entry.socket.close()
+        self.hosts[host] = entry._replace(socket=None)
+        self._owed.pop(host, None)
+        self.number_of_connections -= 1
+
+
+    # --------------------------------------------------------------------------
+    # @fn     __update_connected
+    # @brief  rebuild the table of connected hosts
+    #
+    # This is an internal package function, not meant to be called by the user.
+    # Called whenever a socket is opened or closed, so that sending a command
+    # does not have to sift the connected cameras out of self.hosts each time.
+    # --------------------------------------------------------------------------
+    def __update_connected(self):
+        self._connected = {host: entry for host, entry in self.hosts.items()
+                           if entry.socket is not None}
 
 
     # --------------------------------------------------------------------------
@@ -160,20 +497,23 @@ class Interface:
     def load(self, acffile=None):
         """
         load ACF file
-        """
-        print("loading default firmware file...")
 
+        Args:
+            acffile: path of the ACF file, or None for the default.
+                Only the absolute path is sent; camerad reads the file
+                itself, so its contents never cross the socket.
+        """
         if acffile is None:
-            print("loading default acf file...")
+            self.__report(logging.INFO, "loading default acf file...")
             error = self.__send_command("load")[0]
         else:
-            acffile = os.path.abspath(os.path.expanduser(acffile))
-            print("loading input acf file: %s" % acffile)
+            acffile = _resolve_path(acffile)
+            self.__report(logging.INFO, "loading input acf file: %s", acffile)
             error = self.__send_command("load", acffile)[0]
 
         if error == 0:
-            self.caminfo.set_acf_file(acffile)
-            print("acf file loaded")
+            self.caminfo.acf_file = acffile
+            print("acf file loaded: %s" % (acffile or "default"))
         else:
             print("ERROR: load acf file failed")
 
@@ -197,10 +537,10 @@ class Interface:
         """
         try:
             error, retval = self.__send_command("getp", paramname)
-        except:
+        except OSError as err:
             error = 1
             retval = None
-            print("ERROR: get_param() camera exception")
+            print("ERROR: get_param() camera exception: %s" % err)
 
         return error, retval
 
@@ -217,8 +557,7 @@ class Interface:
         """
         error = self.__send_command("setp", param, value)[0]
         if error == 0:
-            if self.verbose:
-                print("loaded parameter")
+            self.__report(logging.INFO, "loaded parameter")
         else:
             print("error loading parameter (%s=%d)" % (param, value))
         return error
@@ -232,13 +571,13 @@ class Interface:
         Set camera mode.
         -------------------------------------------------
         """
-        old_mode = self.caminfo.get_mode()
+        old_mode = self.caminfo.mode
 
         if old_mode != mode_in:
             error = self.__send_command("mode", mode_in)[0]
             if not error:
                 print("MODE changed: %s -> %s" % (old_mode, mode_in))
-                self.caminfo.set_mode(mode_in)
+                self.caminfo.mode = mode_in
             else:
                 print("ERROR setting mode to %s" % mode_in)
         else:
@@ -257,12 +596,17 @@ class Interface:
         This has no functionality.
         -------------------------------------------------
         """
-        old_type = self.expinfo.get_type()
+        old_type = self.expinfo.type
         if old_type != imtype:
+            # check locally first, so an unknown type never reaches camerad
+            if imtype not in self.expinfo.TYPE:
+                print("ERROR: invalid image type %r, valid types: %s"
+                      % (imtype, ", ".join(self.expinfo.TYPE)))
+                return 1
             error = self.__send_command("key",
                                         "IMTYPE=%s//Image type" % imtype)[0]
             if not error:
-                error = self.expinfo.set_type(imtype)
+                self.expinfo.type = imtype
                 print("IMTYPE set to %s" % imtype)
             else:
                 print("ERROR setting type to %s" % imtype)
@@ -283,11 +627,11 @@ class Interface:
         if not basename:
             print("ERROR: basename cannot be empty")
             return 1
-        old_basename = self.caminfo.get_basename()
+        old_basename = self.caminfo.basename
         if old_basename != basename:
             error = self.__send_command("basename", basename)[0]
             if not error:
-                error = self.caminfo.set_basename(basename)
+                self.caminfo.basename = basename
                 print("BASENAME changed: %s -> %s" % (old_basename, basename))
             else:
                 print("ERROR setting basename to %s" % basename)
@@ -304,34 +648,33 @@ class Interface:
         Set Archon power (i.e. send POWERON or POWEROFF native command).
         Acceptable values are: "ON" or "OFF".
         """
-        old_power_on = self.caminfo.get_power()
+        old_power_on = self.caminfo.power_on
 
         if power == "ON" and not old_power_on:
             if self.archon:
-                print("turning on Archon power...")
+                self.__report(logging.INFO, "turning on Archon power...")
                 error = self.__send_command("POWERON")[0]
             else:
-                print("turning on ARC power...")
-                error = self.__send_command("native", "PON")
+                self.__report(logging.INFO, "turning on ARC power...")
+                error = self.__send_command("native", "PON")[0]
 
         elif power == "OFF" and old_power_on:
             if self.archon:
-                print("turning off Archon power...")
+                self.__report(logging.INFO, "turning off Archon power...")
                 error = self.__send_command("POWEROFF")[0]
             else:
-                print("turning off ARC power...")
-                error = self.__send_command("native","POF")
+                self.__report(logging.INFO, "turning off ARC power...")
+                error = self.__send_command("native", "POF")[0]
         else:
             print("unrecognized power argument", power)
             error = 1
 
+        controller = "Archon" if self.archon else "ARC"
         if error:
-            print(
-                f"ERROR setting {'Archon' if self.archon else 'ARC'} power "
-                f"to {power}")
+            print(f"ERROR setting {controller} power to {power}")
         else:
-            print(f"set {'Archon' if self.archon else 'ARC'} power to {power}")
-            self.caminfo.set_power_on(power == "ON")
+            print(f"set {controller} power to {power}")
+            self.caminfo.power_on = (power == "ON")
 
         return error
 
@@ -346,8 +689,16 @@ class Interface:
         This is essentially a macro, calling the following functions on the server:
         expose(), readframe(), and writeframe()
         """
-        self.expinfo.set_exptime(exptime)
-        self.expinfo.set_iterations(iterations)
+        # set both or neither, so a bad iterations does not leave a new
+        # exptime behind
+        old_exptime = self.expinfo.exptime
+        try:
+            self.expinfo.exptime = exptime
+            self.expinfo.iterations = iterations
+        except ValueError as err:
+            self.expinfo.exptime = old_exptime
+            print("ERROR: %s" % err)
+            return 1
 
         print("starting %d exposures" % iterations)
         error = self.__send_command("expose", iterations)[0]
@@ -356,171 +707,327 @@ class Interface:
 
 
     # --------------------------------------------------------------------------
-    # @fn     __send_threaded_command
-    # @brief  formats and sends command to camera, called in a separate thread
+    # @fn     __send_command
+    # @brief  send a command
     #
     # This is an internal package function, not meant to be called by the user.
+    # Function returns tuple: (error,returnvalue) for commands which may have
+    # a return value. If calling where a returnvalue is not expected, then call
+    # with error=__send_command(...)[0] (for example). error is 0 if every
+    # camera replied DONE, else the error number of the first camera that did
+    # not: the number camerad gave after ERROR, 2 for a timeout or interrupt,
+    # or 1 for anything else.
     # --------------------------------------------------------------------------
-    def __send_threaded_command(self, host, command):
-        if self.verbose:
-            print(
-                'sending "%s" to %s (%s, %d)'
-                % (command, host, self.hosts[host]["ip"],
-                   self.hosts[host]["port"])
-            )
-        try:
-            self.hosts[host]["socket"].sendall(command.encode())
-        except:
-            print("unable to send command. host may be down.")
+    def __send_command(self, *arg_list):
+        if len(arg_list) == 1 and type(arg_list[0]) is str:
+            # a bare command word such as "open" or "POWERON"
+            return self.__send_and_receive(_encode_command(arg_list[0]), 1)
+
+        command = " ".join(str(arg) for arg in arg_list)
+
+        return self.__send_and_receive((command + ENDCHAR).encode(), 1)
 
 
     # --------------------------------------------------------------------------
-    # @fn     __send_command
-    # @brief  send a command
+    # @fn     __send_and_receive
+    # @brief  send payload to every connected camera, read nreplies replies
     #
     # This is an internal package function, not meant to be called by the user.
-    # Function returns tuple: (error,returnvalue) for commands which may have
-    # a return value. If calling where a returnvalue is not expected, then call
-    # with error=__send_command(...)[0] (for example).
+    # payload is the encoded command line(s), written as-is to every camera.
+    # camerad answers the commands on a connection in the order they were
+    # sent, so calls from several threads take turns rather than interleave
+    # their commands and replies on the shared sockets.
     # --------------------------------------------------------------------------
-    def __send_command(self, *arg_list):
-        # stopwatch = []
-        # stopwatch.append(time.time())
-        endchar='\n'
-        numcams = 0  # number of cameras in the set
+    def __send_and_receive(self, payload, nreplies):
+        with self._command_lock:
+            if self._interrupted:
+                # interrupt() was called between commands, with nothing
+                # to interrupt
+                self.__clear_wake()
+            return self.__send_and_receive_all(payload, nreplies)
+
+    # --------------------------------------------------------------------------
+    # @fn     __send_and_receive_all
+    # @brief  send payload to every connected camera, read nreplies replies
+    #
+    # This is an internal package function, not meant to be called by the user.
+    # Called with the command lock held.
+    # --------------------------------------------------------------------------
+    def __send_and_receive_all(self, payload, nreplies):
         numcomplete = 0  # number of cameras reported complete
         numokay = 0  # number of cameras reported without error
-        errno = 0   # error number: 0 - no error
-        threads = []
-        sendsocket = []
-        sendname = []
-        returnlist = []
-
-        command = []
-        for arg in arg_list:
-            command.append(str(arg))
-        command = " ".join(command) + endchar
+        err_code = 0  # error number: 0 - no error
+        # list of the return values from each camera, only built once
+        # two of them differ
+        returnlist = None
 
         if self.number_of_connections <= 0:
             print("ERROR: no connected sockets")
             return 1, ""
 
-        # loop through the set of cameras,
-        # send command to each in a separate thread
-        for host in self.hosts:
-            if "socket" not in self.hosts[host]:
-                continue
-            # create list by socket and name of cameras that are sent a command
-            csock = self.hosts[host]["socket"]
-            print(csock)
-            sendsocket.append(csock)
-            sendname.append(host)
-            # count up the number of cameras that are sent a command
-            numcams += 1
-            thr = Thread(target=self.__send_threaded_command, args=(host, command))
-            thr.start()
-            threads.append(thr)
-
-        # join threads
-        for thr in threads:
-            thr.join()
-
-        # loop through the set of cameras to which a command was sent,
-        # and read back the replies
-        returnvalue = None
-        for cam in range(0, numcams):
-            dat = {}
-            error = {}
-            message = []
+        # the cameras that are sent a command, by host name
+        sendhost = self._connected
+        numcams = len(sendhost)  # number of cameras in the set
+
+        # each reply is read straight into a per-camera buffer, grown
+        # as needed; used is the number of bytes in it so far. All of the
+        # per-camera state is keyed by host name, the selector key data.
+        buf = {host: bytearray(RECV_SIZE) for host in sendhost}
+        view = {host: memoryview(b) for host, b in buf.items()}
+        used = dict.fromkeys(sendhost, 0)
+        nlines = dict.fromkeys(sendhost, 0)
+        error = dict.fromkeys(sendhost, 0)
+        # late replies to earlier commands come first, then these
+        owed = self._owed
+        skip = {host: owed.get(host, 0) for host in sendhost}
+        expect = {host: skip[host] + nreplies for host in sendhost}
+        # cameras still owed a reply
+        pending = set()
+        # the part of the payload the kernel has not yet taken
+        unsent = {}
+        selector = self._selector
+        registered = selector.get_map()
+        # trace messages are only formatted when they will be shown
+        trace = self.verbose or log.isEnabledFor(logging.DEBUG)
+        if trace:
+            command = payload.decode().rstrip()
 
-            # read the first 4 bytes which give the message length
-            while True:
+        try:
+            # send the command to each camera from this thread. The sockets
+            # are non-blocking, so a send takes what fits in the socket buffer
+            # and any remainder is written from the select loop below as the
+            # socket becomes writable.
+            for host, entry in sendhost.items():
+                csock = entry.socket
+                if csock not in registered:
+                    # dropped earlier, after the server closed the connection
+                    # or it fell out of step with its replies
+                    error[host] = 1
+                    continue
+                if trace:
+                    self.__report(logging.DEBUG, 'sending "%s" to %s (%s, %d)',
+                                  command, host, entry.ip, entry.port)
+                try:
+                    sent = csock.send(payload)
+                except BlockingIOError:
+                    sent = 0
+                except OSError as err:
+                    print("unable to send command to %s: %s. host may be down."
+                          % (host, err))
+                    error[host] = 1
+                    continue
+                pending.add(host)
+                if sent < len(payload):
+                    unsent[host] = memoryview(payload)[sent:]
+                    selector.modify(
+                        csock, selectors.EVENT_READ | selectors.EVENT_WRITE,
+                        host)
+
+            # read back the replies from all cameras with the selector the
+            # sockets were registered on at open, handling whichever camera
+            # answers first. The timeout is a single deadline shared by all
+            # cameras, not a wait per camera.
+            deadline = time.monotonic() + REPLY_TIMEOUT
+
+            # read until the reply line (or, for a pipeline, every reply
+            # line) is in
+            while pending:
+                timeout = deadline - time.monotonic()
                 try:
-                    ready = select.select([sendsocket[cam]], [], [], 10)
-                    print(numcams)
-                except select.error:
+                    events = selector.select(timeout) if timeout > 0 else []
+                except OSError:
                     print("select error")
-                    error[cam] = 1
+                    for host in pending:
+                        error[host] = 1
                     break
-                if ready[0]:
-                    ret = sendsocket[cam].recv(1024).decode()
-                else:
+                if not events:
                     print("select timeout")
-                    message.append("\n")
-                    error[cam] = 2
-                    break
-                if "DONE" in ret or "ERROR" in ret or "\n" in ret:
-                    message.append(ret)
-                    error[cam] = 0
+                    for host in pending:
+                        error[host] = 2
                     break
+                interrupted = False
+                for key, mask in events:
+                    host = key.data
+                    if host is None:
+                        interrupted = True
+                        continue
+                    if mask & selectors.EVENT_WRITE:
+                        if not self.__send_remainder(key, unsent):
+                            if host in pending:
+                                pending.discard(host)
+                                error[host] = 1
+                            continue
+                        if not mask & selectors.EVENT_READ:
+                            continue
+                    waiting = host in pending
+                    hbuf = buf[host]
+                    if waiting and used[host] == len(hbuf):
+                        # reply buffer full, double it
+                        view[host].release()
+                        hbuf.extend(bytes(len(hbuf)))
+                        view[host] = memoryview(hbuf)
+                    try:
+                        if not waiting:
+                            # late bytes from a camera whose reply is in
+                            nbytes = len(key.fileobj.recv(RECV_SIZE))
+                        else:
+                            nbytes = key.fileobj.recv_into(
+                                view[host][used[host]:])
+                    except BlockingIOError:
+                        continue
+                    except OSError as err:
+                        print("unable to read reply from %s: %s" % (host, err))
+                        nbytes = 0
+                    if not nbytes:
+                        # connection closed (or reset) by the server,
+                        # stop watching it
+                        unsent.pop(host, None)
+                        selector.unregister(key.fileobj)
+                        if waiting:
+                            error[host] = 1
+                            pending.discard(host)
+                        continue
+                    if not waiting:
+                        continue
+                    # each reply is one line, ended by its newline; DONE or
+                    # ERROR only say how the command went. Only the new bytes
+                    # need scanning.
+                    start = used[host]
+                    end = used[host] = start + nbytes
+                    nlines[host] += hbuf.count(b"\n", start, end)
+                    if nlines[host] >= expect[host]:
+                        pending.discard(host)
+                if interrupted:
+                    self.__clear_wake()
+                    if pending:
+                        print("command interrupted")
+                        for host in pending:
+                            error[host] = 2
+                        break
+        finally:
+            # runs on the way out of a KeyboardInterrupt too, so that no
+            # camera is left registered for writing or out of step
+            for host in unsent:
+                self.__drop_unsynced(host)
+            # a camera that did not answer in time (or before the wait was
+            # given up) still owes its reply lines, to be skipped before
+            # the reply to the next command
+            for host in sendhost:
+                owed[host] = (expect[host] - nlines[host] if host in pending
+                              else 0)
 
-            # dat contains the entire message
-            dat[cam] = message
-
-            #       pdb.set_trace()
-            returnvalue = dat[cam][0].split()[0]
-
-            # Create a list of the return values from each camera
-            returnlist.append(returnvalue)
-
-            #       # pick apart the message to get just the error number
-            #       # (sometimes the error value is empty, so catch ValueError)
-            #       if (len(dat[ii][0].split()) >= 3):
-            #           try:
-            #               error[ii] = int( dat[ii][0].split()[2] )
-            #           except ValueError:
-            #               error[ii] = 1
-
-            # is the word "DONE" somewhere in the response?
-            complete = "".join(dat[cam]).find("DONE")
-            #       pdb.set_trace()
-            if complete >= 0:
-                if self.verbose:
-                    print("%s complete" % sendname[cam])
+        # loop through the set of cameras to which a command was sent,
+        # and check the replies
+        returnvalue = None
+        first_ret = None
+        for cam, host in enumerate(sendhost):
+            # decode the entire message once, now that it is all in,
+            # leaving out any late replies to earlier commands
+            begin = _skip_lines(buf[host], used[host], skip[host])
+            text = str(view[host][begin:used[host]], "ascii", "replace")
+
+            # the return value is the first word of the reply
+            # (empty if the camera timed out or closed the connection)
+            words = text.split(None, 1)
+            returnvalue = words[0] if words else ""
+
+            # Check that each camera returned the same value as the first
+            if cam == 0:
+                first_ret = returnvalue
+            elif returnlist is None and returnvalue != first_ret:
+                # every camera before this one matched the first
+                returnlist = [first_ret] * cam
+            if returnlist is not None:
+                returnlist.append(returnvalue)
+
+            # is the word "DONE" in the response (once per command)?
+            complete = buf[host].count(b"DONE", begin, used[host]) >= nreplies
+            if complete:
+                if trace:
+                    self.__report(logging.DEBUG, "%s complete", host)
                 # increment number reported complete
                 numcomplete += 1
                 # increment number reported without error
                 numokay += 1
             else:
-                if self.verbose:
-                    print(
-                        "%s not complete, error %d [%s]"
-                        % (sendname[cam], error[cam], "error")
-                    )
-
-        # Check that each camera returned the same value.
-        # If not, that is an error condition and return a list of the return values
-        for i, ret in enumerate(returnlist):
-            for j in range(i + 1, len(returnlist)):
-                if ret != returnlist[j]:
-                    numcams = -1
-
-        # stopwatch.append(time.time())
-        # stopwatch = np.diff(np.array(stopwatch))
-        # print "dt = ",
-        # for dt in stopwatch:
-        #     print "%.2f, "%(dt*1e3),
-        # print "\b\b\b ms"
-
-        # number of completes-without-error must equal number of cameras
-        if numcams == numokay:
-            if self.verbose:
-                print("OK")
-            ret = returnvalue
+                # pick apart the message to get just the error number,
+                # unless the camera timed out or went away
+                if not error[host]:
+                    error[host] = _reply_error(buf[host], begin, used[host])
+                if trace:
+                    self.__report(logging.DEBUG,
+                                  "%s not complete, error %d [%s]",
+                                  host, error[host], "error")
+
+        # If the cameras did not all return the same value, that is an
+        # error condition and return a list of the return values
+        mismatch = returnlist is not None
 
         # return a list of the return values, if not all the same
-        elif numcams == -1:
+        if mismatch:
             print("error: different return values")
-            errno = 1
+            err_code = next((e for e in error.values() if e), 1)
             ret = returnlist
 
+        # number of completes-without-error must equal number of cameras
+        elif numcams == numokay:
+            if trace:
+                self.__report(logging.DEBUG, "OK")
+            ret = returnvalue
+
         # something went wrong
         else:
             print("error sending command")
-            errno = 1
+            err_code = next((e for e in error.values() if e), 1)
             ret = ""
 
-        return errno, ret
+        return err_code, ret
+
+    # --------------------------------------------------------------------------
+    # @fn     __send_remainder
+    # @brief  write more of a partially sent payload to a writable camera
+    #
+    # This is an internal package function, not meant to be called by the user.
+    # key is the selector key of the camera socket, unsent the dict of the
+    # unsent part of each payload by host name. Once the whole payload is out
+    # the socket goes back to being watched for reads only. Returns False if
+    # the send failed.
+    # --------------------------------------------------------------------------
+    def __send_remainder(self, key, unsent):
+        host = key.data
+        if host not in unsent:
+            # nothing left to write for this command
+            self._selector.modify(key.fileobj, selectors.EVENT_READ, host)
+            return True
+        try:
+            sent = key.fileobj.send(unsent[host])
+        except BlockingIOError:
+            return True
+        except OSError as err:
+            print("unable to send command to %s: %s. host may be down."
+                  % (host, err))
+            sent = None
+        if sent is not None and sent < len(unsent[host]):
+            unsent[host] = unsent[host][sent:]
+            return True
+        del unsent[host]
+        self._selector.modify(key.fileobj, selectors.EVENT_READ, host)
+        return sent is not None
+
+    # --------------------------------------------------------------------------
+    # @fn     __drop_unsynced
+    # @brief  stop using a camera that never took the whole command
+    #
+    # This is an internal package function, not meant to be called by the user.
+    # camerad would read the rest of the next command as part of this one, so
+    # the replies can no longer be matched to the commands. The socket stays
+    # in self.hosts, reporting an error for every command, until camerad_open
+    # reopens it or close closes it.
+    # --------------------------------------------------------------------------
+    def __drop_unsynced(self, host):
+        print("dropping connection to %s: command only partly sent,"
+              " reopen it with camerad_open" % host)
+        self._selector.unregister(self.hosts[host].socket)
 
     # Code after here is to make the magic board work.
     # That is, create and write bitstreams
@@ -532,15 +1039,15 @@ class Interface:
     # -----------------------------------------------------------------------------
     def __write_bits(self, bitstring):
         # '10111001010011010'
-        if self.verbose:
-            print("Writing bits:", end=" ")
-        for bitlevel in reversed(bitstring):
-            # set param is now in the same file
-            self.set_param("BitLevel", int(bitlevel) + 1)
-            if self.verbose:
-                print("%d" % int(bitlevel), end=" ")
-        if self.verbose:
-            print("")
+        bits = bitstring[::-1]
+        if self.verbose or log.isEnabledFor(logging.DEBUG):
+            self.__report(logging.DEBUG, "Writing bits: %s", " ".join(bits))
+        # one setp per bit, all sent in a single write
+        payload = b"".join(SETP_BITLEVEL[bit] for bit in bits)
+        error = self.__send_and_receive(payload, len(bits))[0]
+        if error:
+            print("error writing bits %s" % bitstring)
+        return error
 
     # -----------------------------------------------------------------------------
     # @fn     __make_bitstring(identifier)
@@ -554,21 +1061,15 @@ class Interface:
         (name, chan) = identifier
         ret = "0"
 
-        if name.lower() == "driver":
-            ret = "{0:06b}".format(np.mod(chan, 24))
-        elif name.lower() == "dnl":
-            ret = "{0:06b}".format(24)
-        elif name.lower() == "hvlc":
-            ret = "{0:06b}".format(32 + np.mod(chan, 24))
-        elif name.lower() == "hvhc":
-            ret = "{0:06b}".format(56 + np.mod(chan, 6))
-        elif name.lower() == "adc":
-            ret = "{0:016b}".format(2 ** np.mod(chan, 16))
-        elif name.lower() == "null":
+        name = name.lower()
+        table = MAGIC_BITSTRINGS.get(name)
+        if table is not None:
+            ret = table[chan % len(table)]
+        elif name == "null":
             if chan == 16:
-                ret = "{0:016b}".format(0)
+                ret = f"{0:016b}"
             else:
-                ret = "{0:06b}".format(25)
+                ret = f"{25:06b}"
         else:
             print("Unrecognized identifier name in __make_bitstring.  returning 0")
 
@@ -612,7 +1113,7 @@ class Interface:
 
         error = 0
 
-        if os.path.isfile(os.path.expanduser(acf_file)):
+        if os.path.isfile(_resolve_path(acf_file)):
             error = self.load(acf_file)  # load in now in same file
         if error:
             print("load('%s') failed" % acf_file)
@@ -634,11 +1135,17 @@ class Interface:
 
         # write to the magic board to configure I/O
         time_0 = time.time()
-        self.__write_bits(self.__make_bitstring(p_in))  # +
-        self.__write_bits(self.__make_bitstring(n_in))  # +
-        self.__write_bits(self.__make_bitstring(p_out))  # +
-        self.__write_bits(self.__make_bitstring(n_out))  # +
-        self.__write_bits("0100")  # junk bits
+        # as a single bitstream: __write_bits sends right to left, so the
+        # first field written (p_in) goes last and the junk bits first
+        bitstream = ("0100"  # junk bits
+                     + self.__make_bitstring(n_out)
+                     + self.__make_bitstring(p_out)
+                     + self.__make_bitstring(n_in)
+                     + self.__make_bitstring(p_in))
+        error = self.__write_bits(bitstream)
+        if error:
+            print("writing magic board bits failed")
+            return error
         if timeit:
             print("Time to write 48 bits: %.3f sec" % (time.time() - time_0))
 
@@ -0,0 +1,120 @@
+"""
+Test fixtures: a fake camerad on localhost and Interfaces connected to it.
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+# the pycamerad modules import each other by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import interface  # noqa: E402
+
+# handler reply that makes the fake camerad close the connection
+CLOSE = object()
+
+
+def default_reply(command):
+    """camerad's reply to command: the value for getp, else just DONE."""
+    if command.startswith("getp"):
+        return "42 DONE\n"
+    return "DONE\n"
+
+
+class FakeCamerad:
+    """
+    A camera server on localhost that answers each command line it reads
+    with reply(command), one connection at a time. The reply is a str, a
+    list of str written out one piece at a time with a short pause between
+    them, None for no reply, or CLOSE to close the connection. Every
+    command line read is recorded in commands.
+    """
+
+    def __init__(self, reply=default_reply):
+        self.reply = reply
+        self.commands = []
+        self._listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self._listener.getsockname()[1]
+        self._conns = []
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            self._conns.append(conn)
+            threading.Thread(target=self._handle, args=(conn,),
+                             daemon=True).start()
+
+    def _handle(self, conn):
+        with conn, conn.makefile("rb") as lines:
+            for line in lines:
+                command = line.decode().rstrip("\n")
+                self.commands.append(command)
+                reply = self.reply(command)
+                if reply is CLOSE:
+                    conn.shutdown(socket.SHUT_RDWR)
+                    return
+                if reply is None:
+                    continue
+                if isinstance(reply, str):
+                    reply = [reply]
+                for piece in reply:
+                    conn.sendall(piece.encode())
+                    time.sleep(0.02)
+
+    def stop(self):
+        self._listener.close()
+        for conn in self._conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def write_configs(directory, servers):
+    """
+    Write interface.json and a hosts.json naming servers cam0, cam1, ...
+    to directory, returning their paths.
+    """
+    hosts = {"cam%d" % num: {"ip": "127.0.0.1", "port": server.port}
+             for num, server in enumerate(servers)}
+    host_config = directory / "hosts.json"
+    host_config.write_text(json.dumps(hosts))
+    interface_config = directory / "interface.json"
+    interface_config.write_text(
+        json.dumps({"interface": "archon", "device_list": []}))
+    return interface_config, host_config
+
+
+@pytest.fixture
+def open_cameras(tmp_path):
+    """
+    Factory: open an Interface to one fake camerad per reply function,
+    returning the Interface and the servers. Closed again after the test.
+    """
+    opened = []
+
+    def open_cameras(*replies):
+        servers = [FakeCamerad(reply) for reply in replies]
+        interface_config, host_config = write_configs(tmp_path, servers)
+        cam = interface.Interface(verbose=False,
+                                  interface_config_file=interface_config,
+                                  host_config_file=host_config)
+        opened.append((cam, servers))
+        assert cam.camerad_open() == 0
+        return cam, servers
+
+    yield open_cameras
+
+    for cam, servers in opened:
+        cam.close()
+        for server in servers:
+            server.stop()
@@ -0,0 +1,45 @@
+"""
+CameraInfo settings and their CameraConfig snapshot.
+"""
+import dataclasses
+
+import pytest
+
+from camera_info import CameraConfig, CameraInfo
+
+
+def test_config_snapshot():
+    caminfo = CameraInfo()
+    assert caminfo.config == CameraConfig()
+    caminfo.mode = "RAW"
+    caminfo.basename = "img"
+    assert caminfo.config == CameraConfig(mode="RAW", basename="img")
+
+
+def test_config_is_hashable_and_frozen():
+    config = CameraInfo(mode="RAW").config
+    cache = {config: "raw"}
+    assert cache[CameraConfig(mode="RAW")] == "raw"
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.mode = "DEFAULT"
+
+
+def test_config_cached_until_a_setting_changes():
+    caminfo = CameraInfo()
+    config = caminfo.config
+    assert caminfo.config is config
+    for name, value in (("interface", "arc"), ("mode", "RAW"),
+                        ("basename", "img"), ("power_on", True),
+                        ("acf_file", "/tmp/x.acf")):
+        setattr(caminfo, name, value)
+        assert caminfo.config is not config
+        assert getattr(caminfo.config, name) == value
+        config = caminfo.config
+
+
+def test_non_str_settings():
+    # e.g. acf_file is None after loading the default acf file
+    caminfo = CameraInfo()
+    caminfo.acf_file = None
+    assert caminfo.acf_file is None
+    assert caminfo.config.acf_file is None
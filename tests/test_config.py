@@ -0,0 +1,58 @@
+"""
+Config file defaults and the parsed config cache.
+"""
+import json
+import os
+
+import camera
+import interface
+
+
+def test_default_host_config_is_shared():
+    # one canonical path, so Interface and Camera share a cache entry
+    assert camera.default_host_config == interface.default_host_config
+    assert interface.default_host_config == os.path.realpath(
+        interface.default_host_config)
+
+
+def write_json(path, data, mtime_ns):
+    path.write_text(json.dumps(data))
+    # explicit times, so a rewrite is seen even on coarse clocks
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def make_interface(tmp_path, hosts, mtime_ns=10**18):
+    interface_config = write_json(
+        tmp_path / "interface.json",
+        {"interface": "arc", "device_list": [1, 2]}, mtime_ns)
+    host_config = write_json(tmp_path / "hosts.json", hosts, mtime_ns)
+    return interface.Interface(verbose=False,
+                               interface_config_file=interface_config,
+                               host_config_file=host_config)
+
+
+def test_config_parsed_once(tmp_path):
+    path = write_json(tmp_path / "hosts.json", {}, 10**18)
+    assert interface._load_config(path) is interface._load_config(str(path))
+
+
+def test_config_reread_when_changed(tmp_path):
+    cam = make_interface(tmp_path,
+                         {"cam0": {"ip": "127.0.0.1", "port": 4242}})
+    assert list(cam.hosts) == ["cam0"]
+    cam = make_interface(tmp_path,
+                         {"cam1": {"ip": "127.0.0.1", "port": 4243}},
+                         mtime_ns=10**18 + 1)
+    assert cam.hosts["cam1"] == interface.Host("cam1", "127.0.0.1", 4243)
+
+
+def test_instances_do_not_share_config(tmp_path):
+    hosts = {"cam0": {"ip": "127.0.0.1", "port": 4242}}
+    cam = make_interface(tmp_path, hosts)
+    assert cam.device_list == [1, 2]
+    cam.device_list.append(3)
+    cam.hosts["cam0"] = cam.hosts["cam0"]._replace(port=1)
+    other = make_interface(tmp_path, hosts)
+    assert other.device_list == [1, 2]
+    assert other.hosts["cam0"].port == 4242
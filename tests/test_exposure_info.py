@@ -0,0 +1,74 @@
+"""
+ExposureInfo settings and the image type codes.
+"""
+import pytest
+
+from exposure_info import ExposureInfo
+from image_types import ImType, TYPE, TYPE_NAME
+
+# the codes of the TYPE dict ExposureInfo used to define
+OLD_TYPE = {
+    "OBJECT": 0, "BIAS": 1, "DARK": 2, "DOME_FLAT": 3, "TWILIGHT_FLAT": 4,
+    "FOCUS": 5, "POINTING": 6, "TEST": 7, "ILLUMINATION": 8, "FRINGE": 9,
+    "SEEING": 10, "OTHER": 11,
+}
+
+
+def test_defaults():
+    expinfo = ExposureInfo()
+    assert expinfo.imtype is ImType.TEST
+    assert expinfo.type == "TEST"
+    assert (expinfo.iterations, expinfo.exptime) == (1, 0)
+
+
+def test_invalid_settings_raise():
+    expinfo = ExposureInfo()
+    with pytest.raises(ValueError):
+        expinfo.exptime = -1
+    with pytest.raises(ValueError):
+        expinfo.set_exptime(-1)
+    with pytest.raises(ValueError):
+        expinfo.iterations = 0
+    with pytest.raises(ValueError):
+        expinfo.set_iterations(-2)
+    with pytest.raises(ValueError):
+        expinfo.type = "SUNSET"
+    with pytest.raises(ValueError):
+        expinfo.set_type("SUNSET")
+    # a rejected setting leaves the old one in place
+    assert (expinfo.exptime, expinfo.iterations, expinfo.type) == (0, 1,
+                                                                  "TEST")
+
+
+def test_deprecated_accessors():
+    expinfo = ExposureInfo()
+    assert expinfo.set_exptime(2.5) == 0
+    assert expinfo.set_iterations(3) == 0
+    assert expinfo.set_type("BIAS") == 0
+    assert expinfo.get_exptime() == 2.5
+    assert expinfo.get_iterations() == 3
+    assert expinfo.get_type() == "BIAS"
+    assert expinfo.imtype is ImType.BIAS
+
+
+def test_type_and_imtype_agree():
+    expinfo = ExposureInfo()
+    expinfo.imtype = 3
+    assert expinfo.type == "DOME_FLAT"
+    expinfo.type = "FRINGE"
+    assert expinfo.imtype == 9
+
+
+def test_type_codes_match_the_old_dicts():
+    assert dict(TYPE) == OLD_TYPE
+    assert dict(TYPE_NAME) == {code: name for name, code in OLD_TYPE.items()}
+    assert ExposureInfo.TYPE is TYPE
+    assert ExposureInfo.TYPE_NAME is TYPE_NAME
+    assert all(ImType[name] == code for name, code in OLD_TYPE.items())
+
+
+def test_type_codes_are_read_only():
+    with pytest.raises(TypeError):
+        TYPE["SUNSET"] = 12
+    with pytest.raises(TypeError):
+        TYPE_NAME[12] = "SUNSET"
@@ -0,0 +1,279 @@
+"""
+Command and reply handling of Interface, against fake camerad servers.
+"""
+import gc
+import json
+import logging
+import socket
+import threading
+import time
+import warnings
+from unittest import mock
+
+import pytest
+
+import interface
+from conftest import CLOSE, FakeCamerad, default_reply, write_configs
+
+
+def slow_reply(command):
+    """Like camerad, but takes half a second to answer "slow"."""
+    if command == "slow":
+        time.sleep(0.5)
+    return default_reply(command)
+
+
+def send_command(cam, *args):
+    return cam._Interface__send_command(*args)
+
+
+def test_single_camera(open_cameras):
+    cam, (server,) = open_cameras(default_reply)
+    assert cam.get_param("X") == (0, "42")
+    assert server.commands == ["open", "getp X"]
+
+
+def test_same_value_from_every_camera(open_cameras):
+    cam, _ = open_cameras(default_reply, default_reply, default_reply)
+    assert cam.get_param("X") == (0, "42")
+
+
+def test_trace_goes_to_the_logger(open_cameras, caplog, capsys):
+    cam, _ = open_cameras(default_reply)
+    capsys.readouterr()
+    with caplog.at_level(logging.DEBUG, logger=interface.log.name):
+        assert cam.get_param("X") == (0, "42")
+    assert 'sending "getp X" to cam0' in caplog.text
+    # printed only when verbose
+    assert capsys.readouterr().out == ""
+    cam.set_verbosity(True)
+    capsys.readouterr()
+    cam.get_param("X")
+    assert 'sending "getp X" to cam0' in capsys.readouterr().out
+
+
+def test_different_return_values(open_cameras):
+    def reply(command):
+        return "7 DONE\n" if command.startswith("getp") else "DONE\n"
+
+    cam, _ = open_cameras(default_reply, reply, default_reply)
+    assert cam.get_param("X") == (1, ["42", "7", "42"])
+
+
+def test_partial_send(open_cameras):
+    # far more than the socket buffers hold, so it is sent in pieces
+    value = "x" * (16 << 20)
+    for ncams in (1, 2):
+        cam, servers = open_cameras(*[default_reply] * ncams)
+        assert cam.set_param("P", value) == 0
+        for server in servers:
+            assert server.commands[-1] == "setp P " + value
+        assert cam.get_param("X") == (0, "42")
+
+
+def test_reply_split_across_reads(open_cameras):
+    def reply(command):
+        if command.startswith("getp"):
+            return ["4", "2 DO", "NE", "\n"]
+        return ["DONE", "\n"]
+
+    for ncams in (1, 2):
+        cam, _ = open_cameras(*[reply] * ncams)
+        assert cam.get_param("X") == (0, "42")
+        # the newline after DONE was read with its reply, not left over
+        assert cam.set_mode("RAW") == 0
+        assert cam.get_param("X") == (0, "42")
+
+
+def test_pipelined_replies(open_cameras):
+    def reply(command):
+        # answer the bits in uneven pieces
+        if command == "setp BitLevel 1":
+            return ["DO", "NE\n"]
+        return default_reply(command)
+
+    cam, (first, _) = open_cameras(reply, default_reply)
+    assert cam._Interface__write_bits("0110") == 0
+    assert first.commands[1:] == ["setp BitLevel %s" % level
+                                  for level in "1221"]
+    assert cam.get_param("X") == (0, "42")
+
+
+def test_error_number(open_cameras):
+    def reply(command):
+        return "ERROR 5\n" if command == "fail" else default_reply(command)
+
+    for ncams in (1, 2):
+        cam, _ = open_cameras(*[reply] * ncams)
+        assert send_command(cam, "fail") == (5, "")
+        assert cam.get_param("X") == (0, "42")
+
+
+def test_reply_timeout(open_cameras):
+    for ncams in (1, 2):
+        cam, _ = open_cameras(*[slow_reply] * ncams)
+        with mock.patch.object(interface, "REPLY_TIMEOUT", 0.2):
+            assert send_command(cam, "slow") == (2, "")
+        # the late reply to "slow" is skipped, not taken for this one
+        assert cam.get_param("X") == (0, "42")
+        assert cam.get_param("X") == (0, "42")
+
+
+def test_interrupt(open_cameras):
+    for ncams in (1, 2):
+        cam, _ = open_cameras(*[slow_reply] * ncams)
+        threading.Timer(0.1, cam.interrupt).start()
+        start = time.monotonic()
+        assert send_command(cam, "slow") == (2, "")
+        assert time.monotonic() - start < 0.4
+        assert cam.get_param("X") == (0, "42")
+
+
+def test_keyboard_interrupt_while_waiting(open_cameras):
+    for ncams in (1, 2):
+        cam, _ = open_cameras(*[slow_reply] * ncams)
+        with mock.patch.object(cam._selector, "select",
+                               side_effect=KeyboardInterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                send_command(cam, "slow")
+        # the late reply to "slow" is still skipped
+        assert cam.get_param("X") == (0, "42")
+
+
+def test_interrupt_between_commands(open_cameras):
+    cam, _ = open_cameras(default_reply, default_reply)
+    cam.interrupt()
+    assert cam.get_param("X") == (0, "42")
+
+
+def test_server_disconnect(open_cameras):
+    def reply(command):
+        return CLOSE if command == "bye" else default_reply(command)
+
+    cam, _ = open_cameras(reply)
+    assert send_command(cam, "bye")[0] == 1
+    assert cam.get_param("X") == (1, "")
+
+    cam, _ = open_cameras(default_reply, reply)
+    assert send_command(cam, "bye") == (1, ["DONE", ""])
+    assert cam.get_param("X") == (1, ["42", ""])
+    # reopening connects to the server again
+    assert cam.camerad_open() == 0
+    assert cam.get_param("X") == (0, "42")
+    assert cam.number_of_connections == 2
+
+
+def test_keyboard_interrupt_during_partial_send(open_cameras):
+    value = "x" * (32 << 20)
+    for ncams in (1, 2):
+        cam, _ = open_cameras(*[default_reply] * ncams)
+        with mock.patch.object(cam._selector, "select",
+                               side_effect=KeyboardInterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                cam.set_param("P", value)
+        # the rest of the command never went out, so the connections
+        # are dropped until they are reopened
+        assert cam.get_param("X")[0] == 1
+        assert cam.camerad_open() == 0
+        assert cam.get_param("X") == (0, "42")
+
+
+def test_dropped_interface_closes_its_sockets(tmp_path):
+    server = FakeCamerad()
+    interface_config, host_config = write_configs(tmp_path, [server])
+    cam = interface.Interface(verbose=False,
+                              interface_config_file=interface_config,
+                              host_config_file=host_config)
+    assert cam.camerad_open() == 0
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        del cam
+        gc.collect()
+    server.stop()
+    assert not [w for w in caught if w.category is ResourceWarning]
+
+
+def test_connect_tries_every_address(tmp_path):
+    # a name such as localhost may resolve to ::1 before 127.0.0.1,
+    # with the server listening on IPv4 only
+    server = FakeCamerad()
+    interface_config, host_config = write_configs(tmp_path, [server])
+    resolved = [
+        (socket.AF_INET6, socket.SOCK_STREAM, 6, "", ("::1", server.port)),
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "",
+         ("127.0.0.1", server.port)),
+    ]
+    cam = interface.Interface(verbose=False,
+                              interface_config_file=interface_config,
+                              host_config_file=host_config)
+    with mock.patch.object(interface.socket, "getaddrinfo",
+                           return_value=resolved):
+        assert cam.camerad_open() == 0
+    assert cam.get_param("X") == (0, "42")
+    cam.close()
+    server.stop()
+
+
+def test_open_with_unreachable_hosts(tmp_path):
+    server = FakeCamerad()
+    # nothing listens on a port just closed, so it refuses connections
+    closed = socket.create_server(("127.0.0.1", 0))
+    refused_port = closed.getsockname()[1]
+    closed.close()
+    # a listener with a full accept queue never completes the handshake
+    full = socket.create_server(("127.0.0.1", 0), backlog=0)
+    filler = socket.create_connection(full.getsockname())
+    interface_config, host_config = write_configs(tmp_path, [server])
+    host_config.write_text(json.dumps({
+        "cam0": {"ip": "127.0.0.1", "port": server.port},
+        "refused": {"ip": "127.0.0.1", "port": refused_port},
+        "stalled": {"ip": "127.0.0.1", "port": full.getsockname()[1]},
+    }))
+    cam = interface.Interface(verbose=False,
+                              interface_config_file=interface_config,
+                              host_config_file=host_config)
+    with mock.patch.object(interface, "CONNECT_TIMEOUT", 0.3):
+        start = time.monotonic()
+        assert cam.camerad_open() == 1
+        # one shared deadline, not a timeout per host
+        assert time.monotonic() - start < 2
+    # the camera that did connect was still opened, and works
+    assert cam.number_of_connections == 1
+    assert server.commands == ["open"]
+    assert cam.get_param("X") == (0, "42")
+    cam.close()
+    filler.close()
+    full.close()
+    server.stop()
+
+
+def baseline_bitstring(name, chan):
+    """The bitstring the original __make_bitstring gave for (name, chan)."""
+    name = name.lower()
+    if name == "driver":
+        return "{0:06b}".format(chan % 24)
+    if name == "dnl":
+        return "{0:06b}".format(24)
+    if name == "hvlc":
+        return "{0:06b}".format(32 + chan % 24)
+    if name == "hvhc":
+        return "{0:06b}".format(56 + chan % 6)
+    if name == "adc":
+        return "{0:016b}".format(2 ** (chan % 16))
+    if name == "null":
+        return "{0:016b}".format(0) if chan == 16 else "{0:06b}".format(25)
+    return "0"
+
+
+def test_magicboard_bitstream(open_cameras):
+    cam, (server,) = open_cameras(default_reply)
+    fields = [("driver", 27), ("ADC", 5), ("hvlc", 3), ("null", 16)]
+    assert cam.magicboard("none", *fields, iterations=2) == 0
+    # the original wrote each field, then the junk bits, right to left,
+    # one set_param("BitLevel", bit + 1) at a time
+    bits = "".join(baseline_bitstring(*field)[::-1] for field in fields)
+    bits += "0100"[::-1]
+    assert server.commands[1:] == (
+        ["mode RAW", "basename magic"]
+        + ["setp BitLevel %d" % (int(bit) + 1) for bit in bits]
+        + ["expose 2"])
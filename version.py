@@ -2,10 +2,12 @@
 Version and package information
 """
 import os
-from pathlib import Path
 import subprocess
-ROOT_DIR = os.path.dirname(str(Path(__file__)))
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_DIR = os.path.join(ROOT_DIR, 'config')
+# the default hosts config, resolved once so that Interface and Camera
+# share its config cache entry
+HOST_CONFIG = os.path.realpath(os.path.join(CONFIG_DIR, 'hosts.json'))
 
 cwd = os.getcwd()
 os.chdir(ROOT_DIR)